@@ -9,79 +9,414 @@ the app.
 """
 
 import argparse
-from csv import DictReader
-import json
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from csv import reader
+from functools import partial
 import logging
+from operator import itemgetter
+import os
 from pathlib import Path
+import pickle
 import re
-from shutil import copy
+from shutil import copyfile
 
 from lxml import etree
-from mido import MidiFile, tempo2bpm
+from mido import tempo2bpm
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 WRITE_TEMPO_MAPS = False
 
+# Number of XML files to download concurrently
+DOWNLOAD_WORKERS = 16
+
+# Number of DRUIDs sent to a worker process at a time
+DRUIDS_PER_TASK = 8
+
 # These are either duplicates of existing rolls, or rolls that are listed in
 # the DRUIDs files but have since disappeared from the library catalog,
 # or rolls that were accessioned incorrectly (hm136vg1420)
 # Note: All Duo-Art rolls are currently unusable because their primary images
 # are upside-down on the server.
-ROLLS_TO_SKIP = [
-    "rr052wh1991",  # Duplicate of gn803sk7089
-    "hm136vg1420",  # Incorrectly mirrored, but replaced by rg676ym0376 - should be de-accessioned
-    "df354sy6634",  # Needs to be flipped vertically
-    "xc735nd8093",  # Needs to be flipped vertically
-    "sh954gz9635",  # Large section of white paper from repair makes it unparsable
-    "wb477ky1555",  # Green W incorrectly cataloged as Red
-    "pz737tz3677",  # Licensee incorrectly cataloged as Green
-    "yj176wj3359",  # Licensee incorrectly cataloged as Green
-    "sm367hr9769",  # Image(s) seem to be corrupted
-    "sj617nc3041",  # All images erroneously mirrored left-right
-]
+ROLLS_TO_SKIP = frozenset(
+    [
+        "rr052wh1991",  # Duplicate of gn803sk7089
+        "hm136vg1420",  # Incorrectly mirrored, but replaced by rg676ym0376 - should be de-accessioned
+        "df354sy6634",  # Needs to be flipped vertically
+        "xc735nd8093",  # Needs to be flipped vertically
+        "sh954gz9635",  # Large section of white paper from repair makes it unparsable
+        "wb477ky1555",  # Green W incorrectly cataloged as Red
+        "pz737tz3677",  # Licensee incorrectly cataloged as Green
+        "yj176wj3359",  # Licensee incorrectly cataloged as Green
+        "sm367hr9769",  # Image(s) seem to be corrupted
+        "sj617nc3041",  # All images erroneously mirrored left-right
+    ]
+)
 
+# Roll type, scale and general notes in the MODS metadata are matched against
+# these after any trailing periods and whitespace, and any "Scale: " prefix,
+# have been removed
 ROLL_TYPES = {
     "Welte-Mignon red roll (T-100)": "welte-red",
-    "Welte-Mignon red roll (T-100).": "welte-red",
-    "Welte-Mignon red roll (T-100)..": "welte-red",
-    "Scale: 88n": "88-note",
-    "Scale: 88n.": "88-note",
-    "Scale: 65n.": "65-note",
     "88n": "88-note",
     "65n": "65-note",
     "standard": "88-note",
     "non-reproducing": "88-note",
     "Welte-Mignon green roll (T-98)": "welte-green",
-    "Welte-Mignon green roll (T-98).": "welte-green",
     "Welte-Mignon licensee roll": "welte-licensee",
-    "Welte-Mignon licensee roll.": "welte-licensee",
-    "Welte-Mignon licensee roll (T-98).": "welte-licensee",
+    "Welte-Mignon licensee roll (T-98)": "welte-licensee",
     "Duo-Art piano rolls": "duo-art",
-    "Duo-Art piano rolls.": "duo-art",
+}
+
+# MIDI numbers of the tracker holes that shouldn't see much (or any) use on
+# each type of roll; a roll with too many holes in these columns is flagged by
+# check_midi_profile()
+SUSPICIOUS_MIDI = {
+    # Left control: 14-23 (22 and 23 are questionable because many rolls do use the motor (fan) on/off switch)
+    # C1: 24, C#1: 25, G7: 103
+    # 104: rewind, 106: electric cutoff (rarely used). Right control ends at 113
+    "welte-red": frozenset(
+        [10, 11, 12, 13, 24, 25, 103, 104, 105, 106, 114, 115, 116, 117, 118]
+    ),
+    # Left control: 16-20, A0: 21, A#0: 22, A#7: 106, B7: 107, C8: 108, Right control: 109-113
+    # Green Welte rewind (16, shared with sfzp) holes tend to be longer.
+    # Also sometimes there's a long C8 (108) after the rewind...
+    "welte-green": frozenset(
+        [10, 11, 12, 13, 14, 15, 21, 22, 23, 106, 107, 108, 114, 115, 116, 117, 118]
+    ),
+    # Left control: 16-23, C1: 24, C#1: 25, F#7: 102, G7: 103, Rewind: 104, Blank: 105, Right control: 106-113
+    "welte-licensee": frozenset(
+        [10, 11, 12, 13, 14, 15, 24, 25, 102, 103, 104, 105, 114, 115, 116, 117, 118]
+    ),
+    # Unused controls: 15-17, except 16 is sometimes the rewind hole
+    # A0: 21, A#0: 22, B6: 107, C7: 108
+    # Unused controls: 111-114
+    "88-note": frozenset([*range(10, 18), 21, 22, 107, 108, *range(111, 119)]),
+    # Rewind (wide hole): 16, Empty (overlaps with rewind): 17, Left controls: 18-24
+    # C#1: 25, D1: 26, G7: 103, G#7: 104
+    # Right control: 105-110, 111-112 blank, 113 is sustain pedal
+    "duo-art": frozenset(
+        [10, 11, 12, 13, 14, 15, 25, 26, 103, 104, 111, 112, 114, 115, 116, 117, 118]
+    ),
+}
+
+# The name used in log messages and the MIDI numbers of the expected rewind
+# hole(s), which should be the last hole on the roll, for each roll type that
+# has one
+REWIND_HOLES = {
+    "welte-red": ("Red Welte", frozenset([104, 14])),  # 113 is also pretty common
+    "welte-green": ("Green Welte", frozenset([16])),
+    "welte-licensee": ("Licensee", frozenset([104])),
+    "duo-art": ("Duo-Art", frozenset([16])),
 }
 
 PURL_BASE = "https://purl.stanford.edu/"
 STACKS_BASE = "https://stacks.stanford.edu/file/"
 
+# A shared session keeps connections to the Stanford Digital Repository open
+# between requests, rather than doing a new TCP/TLS handshake for each DRUID.
+# Responses are requested gzip-compressed (the requests default).
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_maxsize=32))
+
+# Parsing a roll's hole analysis output is the slowest step in processing it,
+# so the results are cached in HOLE_CACHE_DIR between runs. Increase this
+# whenever the output of get_hole_report_data() changes, so that hole data
+# cached by an earlier version of this script isn't reused.
+HOLE_CACHE_VERSION = 1
+
 MIDI_DIR = "midi"
 TXT_DIR = "input/txt"
+HOLE_CACHE_DIR = "cache/holes"
 NS = {"x": "http://www.loc.gov/mods/v3"}
 
 
-def get_metadata_for_druid(druid, redownload_xml):
-    """Obtains a .xml metadata file for the roll specified by DRUID either
-    from the local input/xml/ folder or the Stanford Digital Repository, then
-    parses the XML to build the metadata dictionary for the roll.
+def compile_xpath(xpath):
+    """Compiles a MODS XPath expression once, at import time, so that it
+    doesn't need to be reparsed for every DRUID. Text results are returned as
+    plain strings, as nothing needs to navigate back to their parent elements,
+    which saves building a "smart" string object for every result."""
+
+    return etree.XPath(xpath, namespaces=NS, smart_strings=False)
+
+
+def compile_xpaths(xpaths):
+    """Runs compile_xpath() on each of a list of XPath expressions."""
+
+    return [compile_xpath(xpath) for xpath in xpaths]
+
+
+def compile_find_text(path):
+    """Converts a MODS ElementPath expression to Clark notation and returns a
+    function that gets the text of the first element it matches, in the same
+    form as a compiled text() XPath would return it. For simple child lookups
+    such as these, lxml's find() is much cheaper than evaluating an XPath, and
+    stops at the first match."""
+
+    path = path.replace("x:", f"{{{NS['x']}}}")
+
+    def find_text(element):
+        found = element.find(path)
+        if found is None or found.text is None:
+            return []
+        return [found.text]
+
+    return find_text
+
+
+PHYSICAL_DESCRIPTION_TAG = f"{{{NS['x']}}}physicalDescription"
+NOTE_TAG = f"{{{NS['x']}}}note"
+NAME_TAG = f"{{{NS['x']}}}name"
+NAME_PART_TAG = f"{{{NS['x']}}}namePart"
+ROLE_TERM_TAG = f"{{{NS['x']}}}roleTerm"
+RELATED_ITEM_TAG = f"{{{NS['x']}}}relatedItem"
+MODS_XPATH = compile_xpath("//x:mods")
+
+# Nothing looks elements up by their xml:id, so don't index them when parsing
+XML_PARSER = etree.XMLParser(collect_ids=False)
+
+ROLL_KEYS = frozenset(
+    [
+        b"AVG_HOLE_WIDTH",
+        b"FIRST_HOLE",
+        b"IMAGE_WIDTH",
+        b"IMAGE_LENGTH",
+        # b"TRACKER_HOLES",
+        # b"ROLL_WIDTH",
+        # b"HARD_MARGIN_BASS",
+        # b"HARD_MARGIN_TREBLE",
+        # b"HOLE_SEPARATION",
+        # b"HOLE_OFFSET",
+    ]
+)
+
+HOLE_KEYS = frozenset(
+    [
+        b"NOTE_ATTACK",
+        b"WIDTH_COL",
+        b"ORIGIN_COL",
+        b"ORIGIN_ROW",
+        b"OFF_TIME",
+        b"MIDI_KEY",
+        # b"TRACKER_HOLE",
+    ]
+)
+
+# Matches either an @ATON "@@BEGIN: SECTION" / "@@END: SECTION" line or a
+# "@KEY: value" line for one of the keys that are kept, in the contents of a
+# hole analysis output file. Lines may end in either LF or CRLF, and the line
+# ending is never part of a captured value.
+ATON_TOKEN = re.compile(
+    rb"^@@(BEGIN|END): ([A-Z]+)\r?\n|^@("
+    + b"|".join(sorted(ROLL_KEYS | HOLE_KEYS))
+    + rb"):[^\S\r\n]+([^\r\n]*)",
+    re.MULTILINE,
+)
+
+# The roll image is the first .jp2 file listed after the label of the primary
+# image resource in the (non-MODS) content metadata of the PURL XML
+IMAGE_LABEL = re.compile(r"^(display image|jp2|[Ii]mage \d)$")
+IMAGE_FILE_ID = re.compile(r"^[^.]*\.jp2")
+
+# Each title field maps to a list of potential finders, which are used in the
+# same way as compiled text() xpaths; the first one that matches provides the
+# field's value.
+TITLE_FINDERS = {
+    "title_prefix": [compile_find_text("x:titleInfo[@usage='primary']/x:nonSort")],
+    "title": [compile_find_text("x:titleInfo[@usage='primary']/x:title")],
+    "title_part_number": [
+        compile_find_text("x:titleInfo[@usage='primary']/x:partNumber")
+    ],
+    "title_part_name": [compile_find_text("x:titleInfo[@usage='primary']/x:partName")],
+    "subtitle": [compile_find_text("x:titleInfo/x:subTitle")],
+}
+
+# The roleTerm values that identify the people credited on a roll, for each
+# field, in order of preference
+PEOPLE_ROLES = {
+    "composer": ["composer", "Composer", "composer.", "cmp"],
+    "performer": ["instrumentalist", "instrumentalist."],
+    "arranger": ["arranger of music", "arranger"],
+}
+ROLE_FIELDS = {
+    role: (field, rank)
+    for field, roles in PEOPLE_ROLES.items()
+    for rank, role in enumerate(roles)
+}
+
+# The displayLabel values of the relatedItem that names the composer of the
+# work a roll is based on, in order of preference
+ORIGINAL_COMPOSER_LABELS = [
+    "Based on (work) :",
+    "Based on",
+    # "Adaptation of (work) :",
+    "Adaptation of",
+    "Arrangement of :",
+    "Arrangement of",
+]
+ORIGINAL_COMPOSER_RANKS = {
+    label: rank for rank, label in enumerate(ORIGINAL_COMPOSER_LABELS)
+}
+
+METADATA_XPATHS = {
+    "label": compile_xpaths(
+        [
+            "x:identifier[@type='issue number' and @displayLabel='Roll number']/text()",
+            "x:identifier[@type='issue number']/text()",
+        ]
+    ),
+    "publisher": compile_xpaths(
+        [
+            "x:identifier[@type='publisher']/text()",
+            "x:originInfo[@eventType='publication']/x:publisher/text()",
+            "x:name[@type='corporate']/x:nameType/text()",
+            "x:name[descendant::x:roleTerm[text()='publisher.']]/x:namePart/text()",
+        ]
+    ),
+    "number": compile_xpaths(["x:identifier[@type='publisher number']/text()"]),
+    "publish_date": compile_xpaths(
+        [
+            "x:originInfo[@eventType='publication']/x:dateIssued[@keyDate='yes']/text()",
+            "x:originInfo[@eventType='publication']/x:dateIssued/text()",
+            "x:originInfo/x:dateIssued[@point='start']/text()",
+            "x:originInfo[@displayLabel='publisher']/x:dateIssued/text()",
+        ]
+    ),
+    "publish_place": compile_xpaths(
+        [
+            "x:originInfo[@eventType='publication']/x:place/x:placeTerm[@type='text']/text()",
+            "x:originInfo[@displayLabel='publisher']/x:place/x:placeTerm/text()",
+        ]
+    ),
+    "recording_date": compile_xpaths(
+        [
+            "x:note[@type='venue']/text()",
+            "x:originInfo[@eventType='publication']/x:dateCaptured/text()",
+        ]
+    ),
+    # The call number is not consistently available in all MODS variants
+    # "call_number": compile_xpaths(["x:location/x:shelfLocator/text()"]),
+}
+
+
+def download_xml(druid):
+    """Downloads the .xml metadata file for the roll specified by DRUID from
+    the Stanford Digital Repository to the local input/xml/ folder. The ETag
+    of the downloaded file is kept alongside it, so that an unchanged file
+    isn't transferred again when it is next requested."""
+
+    xml_filepath = Path(f"input/xml/{druid}.xml")
+    etag_filepath = Path(f"input/xml/{druid}.etag")
+
+    headers = {}
+    if xml_filepath.exists() and etag_filepath.exists():
+        headers["If-None-Match"] = etag_filepath.read_text()
+
+    response = SESSION.get(f"{PURL_BASE}{druid}.xml", headers=headers)
+    if response.status_code == 304:
+        return
+
+    # The old ETag is removed before the file is replaced, and the new one is
+    # only written afterwards, so that an interrupted download can't leave an
+    # ETag next to a file that it doesn't match
+    xml_data = response.content
+    etag_filepath.unlink(missing_ok=True)
+    temp_path = xml_filepath.with_suffix(".xml.tmp")
+    temp_path.write_bytes(xml_data)
+    os.replace(temp_path, xml_filepath)
+    if "ETag" in response.headers:
+        etag_filepath.write_text(response.headers["ETag"])
+
+
+def get_name_text(name):
+    """Returns the text of the first non-date namePart of a MODS name, if
+    any."""
+
+    for name_part in name.iterchildren(NAME_PART_TAG):
+        if name_part.get("type") != "date" and name_part.text is not None:
+            return name_part.text
+    return None
+
+
+def get_people(xml_tree):
+    """Finds the composer, performer, arranger and original composer of a roll
+    in a single pass over the names and related items in its MODS record,
+    taking the first name listed with the most preferred role or label."""
+
+    people = dict.fromkeys([*PEOPLE_ROLES, "original_composer"])
+    ranks = {}
+
+    for name in xml_tree.iterchildren(NAME_TAG):
+        for role_term in name.iter(ROLE_TERM_TAG):
+            if role_term.text not in ROLE_FIELDS:
+                continue
+            field, rank = ROLE_FIELDS[role_term.text]
+            if rank < ranks.get(field, len(PEOPLE_ROLES[field])):
+                name_text = get_name_text(name)
+                if name_text is not None:
+                    people[field] = name_text
+                    ranks[field] = rank
+
+    original_composer_rank = len(ORIGINAL_COMPOSER_LABELS)
+    for related_item in xml_tree.iterchildren(RELATED_ITEM_TAG):
+        rank = ORIGINAL_COMPOSER_RANKS.get(related_item.get("displayLabel"))
+        if rank is None or rank >= original_composer_rank:
+            continue
+        for name in related_item.iterchildren(NAME_TAG):
+            if name.get("type") != "personal":
+                continue
+            name_text = get_name_text(name)
+            if name_text is not None:
+                people["original_composer"] = name_text
+                original_composer_rank = rank
+                break
+
+    return people
+
+
+def get_image_id(xml_doc):
+    """Returns the file id of the roll image in the PURL XML, scanning the
+    content metadata labels and files in document order and stopping at the
+    first match."""
+
+    found_label = False
+    for element in xml_doc.iter("label", "file"):
+        if not found_label:
+            found_label = element.tag == "label" and bool(
+                IMAGE_LABEL.search(element.text or "")
+            )
+        elif element.tag == "file" and IMAGE_FILE_ID.search(element.get("id", "")):
+            return element.get("id")
+    return None
+
+
+def normalize_roll_type_note(note):
+    """Returns the text of a roll type, scale or general note in the MODS
+    metadata in the form used by ROLL_TYPES, or None if there is no note."""
+
+    if note is None:
+        return None
+    return note.rstrip(". ").strip().removeprefix("Scale: ")
+
+
+def classify_roll_type(note):
+    """Returns the roll type identified by the text of a roll type, scale or
+    general note in the MODS metadata, or None if it doesn't identify one."""
+
+    return ROLL_TYPES.get(normalize_roll_type_note(note))
+
+
+def get_metadata_for_druid(druid):
+    """Parses the .xml metadata file for the roll specified by DRUID in the
+    local input/xml/ folder (where main() will have downloaded it, if needed)
+    to build the metadata dictionary for the roll.
     """
 
     def get_value_by_xpath(xpath):
-        try:
-            return xml_tree.xpath(
-                xpath,
-                namespaces=NS,
-            )[0]
-        except IndexError:
-            return None
+        result = xpath(xml_tree)
+        return result[0] if result else None
 
     # Takes an array of potential xpaths, returns the first one that matches,
     # or None
@@ -94,20 +429,13 @@ def get_metadata_for_druid(druid, redownload_xml):
 
     xml_filepath = Path(f"input/xml/{druid}.xml")
 
-    if not xml_filepath.exists() or redownload_xml:
-        response = requests.get(f"{PURL_BASE}{druid}.xml")
-        xml_data = response.text
-        with xml_filepath.open("w", encoding="utf-8") as _fh:
-            _fh.write(xml_data)
-    else:
-        xml_data = xml_filepath.open("r", encoding="utf-8").read()
-
+    # The MODS record is embedded in the full public XML for the object; parse
+    # that (leaving decoding to lxml) and select it from there. The file is
+    # passed to lxml by name so that libxml2 reads it directly.
     try:
-        mods_xml = (
-            "<mods" + xml_data.split(r"<mods")[1].split(r"</mods>")[0] + "</mods>"
-        )
-        xml_tree = etree.fromstring(mods_xml)
-    except etree.XMLSyntaxError:
+        xml_doc = etree.parse(str(xml_filepath), XML_PARSER)
+        xml_tree = MODS_XPATH(xml_doc)[0]
+    except (OSError, etree.XMLSyntaxError, IndexError):
         logging.error(
             f"Unable to parse XML metadata for {druid} - record is likely missing."
         )
@@ -116,125 +444,59 @@ def get_metadata_for_druid(druid, redownload_xml):
     # The representation of the roll type in the MODS metadata continues to
     # evolve. Hopefully this logic covers all cases.
     roll_type = "NA"
-    type_note = get_value_by_xpath(
-        "x:physicalDescription/x:note[@displayLabel='Roll type']/text()"
-    )
-    scale_note = get_value_by_xpath(
-        "x:physicalDescription/x:note[@displayLabel='Scale']/text()"
-    )
-    if type_note is not None and type_note in ROLL_TYPES:
-        roll_type = ROLL_TYPES[type_note]
-
-    if (
-        scale_note is not None
-        and scale_note in ROLL_TYPES
-        and (roll_type == "NA" or type_note == "standard")
-    ):
-        roll_type = ROLL_TYPES[scale_note]
-
-    if roll_type == "NA" or type_note == "standard":
-        for note in xml_tree.xpath("(x:note)", namespaces=NS):
-            if (
-                note is not None
-                and note.text in ROLL_TYPES
-                # Most rolls of any type are marked as "88n", so don't let this
-                # setting overwrite a more specific roll type note.
-                and (ROLL_TYPES[note.text] != "88-note" or roll_type == "NA")
-            ):
-                roll_type = ROLL_TYPES[note.text]
+
+    # Find the first "Roll type" and "Scale" physical description notes
+    type_note = None
+    scale_note = None
+    for physical_description in xml_tree.iterchildren(PHYSICAL_DESCRIPTION_TAG):
+        for note in physical_description.iterchildren(NOTE_TAG):
+            label = note.get("displayLabel")
+            if label == "Roll type" and type_note is None:
+                type_note = note.text
+            elif label == "Scale" and scale_note is None:
+                scale_note = note.text
+
+    # A "standard" roll type note can be refined by the other notes, so it is
+    # compared in the same normalized form that's used to classify it
+    type_note = normalize_roll_type_note(type_note)
+    is_standard_type = type_note == "standard"
+
+    type_note_roll_type = ROLL_TYPES.get(type_note)
+    scale_note_roll_type = classify_roll_type(scale_note)
+    if type_note_roll_type is not None:
+        roll_type = type_note_roll_type
+
+    if scale_note_roll_type is not None and (roll_type == "NA" or is_standard_type):
+        roll_type = scale_note_roll_type
+
+    if roll_type == "NA" or is_standard_type:
+        # The last note that names a specific roll type wins, so scan the notes
+        # from the end and stop there. Most rolls of any type are marked as
+        # "88n", so only fall back to that if nothing more specific is found.
+        has_88_note = False
+        for note in xml_tree.iterchildren(NOTE_TAG, reversed=True):
+            note_roll_type = classify_roll_type(note.text)
+            if note_roll_type == "88-note":
+                has_88_note = True
+            elif note_roll_type is not None:
+                roll_type = note_roll_type
+                break
+        else:
+            if has_88_note and roll_type == "NA":
+                roll_type = "88-note"
 
     metadata = {
-        "title_prefix": get_value_by_xpath(
-            "(x:titleInfo[@usage='primary']/x:nonSort)[1]/text()"
-        ),
-        "title": get_value_by_xpath(
-            "(x:titleInfo[@usage='primary']/x:title)[1]/text()"
-        ),
-        "title_part_number": get_value_by_xpath(
-            "(x:titleInfo[@usage='primary']/x:partNumber)[1]/text()"
-        ),
-        "title_part_name": get_value_by_xpath(
-            "(x:titleInfo[@usage='primary']/x:partName)[1]/text()"
-        ),
-        "subtitle": get_value_by_xpath("(x:titleInfo/x:subTitle)[1]/text()"),
-        "composer": get_value_by_xpaths(
-            [
-                "x:name[descendant::x:roleTerm[text()='composer']]/x:namePart[not(@type='date')]/text()",
-                "x:name[descendant::x:roleTerm[text()='Composer']]/x:namePart[not(@type='date')]/text()",
-                "x:name[descendant::x:roleTerm[text()='composer.']]/x:namePart[not(@type='date')]/text()",
-                "x:name[descendant::x:roleTerm[text()='cmp']]/x:namePart[not(@type='date')]/text()",
-            ]
-        ),
-        "performer": get_value_by_xpaths(
-            [
-                "x:name[descendant::x:roleTerm[text()='instrumentalist']]/x:namePart[not(@type='date')]/text()",
-                "x:name[descendant::x:roleTerm[text()='instrumentalist.']]/x:namePart[not(@type='date')]/text()",
-            ]
-        ),
-        "arranger": get_value_by_xpaths(
-            [
-                "x:name[descendant::x:roleTerm[text()='arranger of music']]/x:namePart[not(@type='date')]/text()",
-                "x:name[descendant::x:roleTerm[text()='arranger']]/x:namePart[not(@type='date')]/text()",
-            ]
-        ),
-        "original_composer": get_value_by_xpaths(
-            [
-                "x:relatedItem[@displayLabel='Based on (work) :']/x:name[@type='personal']/x:namePart[not(@type='date')]/text()",
-                "x:relatedItem[@displayLabel='Based on']/x:name[@type='personal']/x:namePart[not(@type='date')]/text()",
-                "x:relatedItem[@displayLabele='Adaptation of (work) :']/x:name[@type='personal']/x:namePart[not(@type='date')]/text()",
-                "x:relatedItem[@displayLabel='Adaptation of']/x:name[@type='personal']/x:namePart[not(@type='date')]/text()",
-                "x:relatedItem[@displayLabel='Arrangement of :']/x:name[@type='personal']/x:namePart[not(@type='date')]/text()",
-                "x:relatedItem[@displayLabel='Arrangement of']/x:name[@type='personal']/x:namePart[not(@type='date')]/text()",
-            ]
-        ),
-        "label": get_value_by_xpaths(
-            [
-                "x:identifier[@type='issue number' and @displayLabel='Roll number']/text()",
-                "x:identifier[@type='issue number']/text()",
-            ]
-        ),
-        "publisher": get_value_by_xpaths(
-            [
-                "x:identifier[@type='publisher']/text()",
-                "x:originInfo[@eventType='publication']/x:publisher/text()",
-                "x:name[@type='corporate']/x:nameType/text()",
-                "x:name[descendant::x:roleTerm[text()='publisher.']]/x:namePart/text()",
-            ]
-        ),
-        "number": get_value_by_xpath("x:identifier[@type='publisher number']/text()"),
-        "publish_date": get_value_by_xpaths(
-            [
-                "x:originInfo[@eventType='publication']/x:dateIssued[@keyDate='yes']/text()",
-                "x:originInfo[@eventType='publication']/x:dateIssued/text()",
-                "x:originInfo/x:dateIssued[@point='start']/text()",
-                "x:originInfo[@displayLabel='publisher']/x:dateIssued/text()",
-            ]
-        ),
-        "publish_place": get_value_by_xpaths(
-            [
-                "x:originInfo[@eventType='publication']/x:place/x:placeTerm[@type='text']/text()",
-                "x:originInfo[@displayLabel='publisher']/x:place/x:placeTerm/text()",
-            ]
-        ),
-        "recording_date": get_value_by_xpaths(
-            [
-                "x:note[@type='venue']/text()",
-                "x:originInfo[@eventType='publication']/x:dateCaptured/text()",
-            ]
-        ),
-        # The call number is not consistently available in all MODS variants
-        # "call_number": get_value_by_xpath("x:location/x:shelfLocator/text()"),
-        "type": roll_type,
-        "PURL": PURL_BASE + druid,
+        field: get_value_by_xpaths(finders) for field, finders in TITLE_FINDERS.items()
     }
+    metadata.update(get_people(xml_tree))
+    for field, xpaths in METADATA_XPATHS.items():
+        metadata[field] = get_value_by_xpaths(xpaths)
+    metadata["type"] = roll_type
+    metadata["PURL"] = PURL_BASE + druid
 
     # Derive the value for the IIIF info.json file URL, which is eventually
     # used to display the roll image in a viewer such as OpenSeadragon
-    image_id = re.search(
-        r"^.*?<label>(?:display image|jp2|[Ii]mage \d)<\/label>.*?<file id=\"([^\.]*)\.jp2",
-        xml_data,
-        re.MULTILINE | re.DOTALL,
-    ).group(1)
+    image_id = get_image_id(xml_doc).split(".")[0]
     metadata["image_url"] = (
         f"https://stacks.stanford.edu/image/iiif/{image_id.split('_')[0]}/{image_id}/info.json"
     )
@@ -242,82 +504,176 @@ def get_metadata_for_druid(druid, redownload_xml):
     return metadata
 
 
-def build_tempo_map_from_midi(druid):
-    """Extracts the tempo events (if present) from the output MIDI file for the
-    roll specified by the input DRUID and return it as a list of timings and
-    tempos."""
+def read_variable_int(data, pos):
+    """Decodes the MIDI variable-length quantity starting at position pos of
+    data, returning its value and the position following it."""
+
+    value = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value = (value << 7) | (byte & 0x7F)
+        if byte < 0x80:
+            return value, pos
+
+
+def get_midi_ticks_per_beat(midi_filepath):
+    """Returns the ticks per beat (the "division" value in the MThd header
+    chunk) of the MIDI file at midi_filepath, reading only its header."""
+
+    with open(midi_filepath, "rb") as _fh:
+        header = _fh.read(14)
+    return int.from_bytes(header[12:14], "big", signed=True)
+
+
+def read_midi_tracks(midi_filepath):
+    """Reads the Standard MIDI File at midi_filepath and returns the raw,
+    still-encoded data of each of its track chunks. Only the events that are
+    actually needed then get decoded from these, which is much faster than
+    building a message object for every event in the file."""
+
+    midi_data = Path(midi_filepath).read_bytes()
+
+    num_tracks = int.from_bytes(midi_data[10:12], "big")
+    pos = 8 + int.from_bytes(midi_data[4:8], "big")
+
+    tracks = []
+    while len(tracks) < num_tracks and pos < len(midi_data):
+        chunk_size = int.from_bytes(midi_data[pos + 4 : pos + 8], "big")
+        if midi_data[pos : pos + 4] == b"MTrk":
+            tracks.append(midi_data[pos + 8 : pos + 8 + chunk_size])
+        pos += 8 + chunk_size
+
+    return tracks
+
+
+def iter_midi_events(track_data):
+    """Decodes the raw data of a MIDI track chunk, yielding the absolute tick,
+    status byte and position of the data of each of its events. For meta
+    events, the status is 0xFF and the position is that of the meta event type
+    byte; for sysex events, it is that of the data following the length."""
+
+    tick = 0
+    status = None
+    pos = 0
+
+    while pos < len(track_data):
+        byte = track_data[pos]
+        pos += 1
+        delta = byte & 0x7F
+        while byte >= 0x80:
+            byte = track_data[pos]
+            pos += 1
+            delta = (delta << 7) | (byte & 0x7F)
+        tick += delta
+
+        # A data byte here means that the previous status is being reused
+        # ("running status"), but meta events don't set the running status
+        if track_data[pos] >= 0x80:
+            if track_data[pos] == 0xFF:
+                yield tick, 0xFF, pos + 1
+                length, pos = read_variable_int(track_data, pos + 2)
+                pos += length
+                continue
+            status = track_data[pos]
+            pos += 1
+        elif status is None:
+            raise ValueError("MIDI running status used without a previous status")
+
+        if status == 0xF0 or status == 0xF7:
+            length, pos = read_variable_int(track_data, pos)
+            yield tick, status, pos
+            pos += length
+        elif status >= 0xF0:
+            raise ValueError(f"Unexpected MIDI status byte in track: {status:#x}")
+        else:
+            yield tick, status, pos
+            if status & 0xF0 == 0xC0 or status & 0xF0 == 0xD0:
+                pos += 1
+            else:
+                pos += 2
+
+
+def iter_note_on_events(track_data):
+    """Yields the absolute tick, note number and velocity of each note_on event
+    in the raw data of a MIDI track chunk."""
 
-    midi_filepath = Path(f"output/midi/{druid}.mid")
-    midi = MidiFile(midi_filepath)
+    for tick, status, pos in iter_midi_events(track_data):
+        if status & 0xF0 == 0x90:
+            yield tick, track_data[pos], track_data[pos + 1]
 
-    tempo_map = []
-    current_tick = 0
 
-    for event in midi.tracks[0]:
-        current_tick += event.time
-        if event.type == "set_tempo":
-            tempo_map.append((current_tick, tempo2bpm(event.tempo)))
+def iter_tempo_events(track_data):
+    """Yields the absolute tick and tempo (in microseconds per beat) of each
+    set_tempo meta event in the raw data of a MIDI track chunk."""
 
-    return tempo_map
+    for tick, status, pos in iter_midi_events(track_data):
+        if status == 0xFF and track_data[pos] == 0x51:
+            length, pos = read_variable_int(track_data, pos + 1)
+            yield tick, int.from_bytes(track_data[pos : pos + 3], "big")
 
 
-def merge_midi_velocities(roll_data, hole_data, druid, roll_type):
-    """Parses the output MIDI file for the roll specified by the input DRUID
-    and aligns the velocities assigned to each note event to the detected holes
-    in the provided hole_data input, which is derived from the roll image
-    parsing output. This aligned data can then be provided in the roll JSON
-    output file for use when highlighting the note holes in the roll when it is
-    displayed in the Pianolatron app."""
+def build_tempo_map_from_midi(midi_tracks):
+    """Extracts the tempo events (if present) from the tracks of the output
+    MIDI file for a roll, as read by read_midi_tracks(), and return it as a
+    list of timings and tempos."""
 
-    midi_filepath = Path(f"output/midi/exp/{druid}.mid")
+    # Only the first track holds tempo events, so the rest aren't decoded
+    return [
+        (tick, tempo2bpm(tempo)) for tick, tempo in iter_tempo_events(midi_tracks[0])
+    ]
+
+
+def merge_midi_velocities(roll_data, hole_data, druid, midi_tracks, roll_type):
+    """Parses the tracks of the output MIDI file for the roll specified by the
+    input DRUID, as read by read_midi_tracks(), and aligns the velocities
+    assigned to each note event to the detected holes in the provided
+    hole_data input, which is derived from the roll image parsing output. This
+    aligned data can then be provided in the roll JSON output file for use
+    when highlighting the note holes in the roll when it is displayed in the
+    Pianolatron app."""
 
-    if not midi_filepath.exists():
+    if midi_tracks is None:
         logging.info(
             f"MIDI file not found for {druid}, won't include velocities in .json"
         )
         return hole_data
 
-    first_music_px = int(roll_data["FIRST_HOLE"].removesuffix("px"))
-
-    midi = MidiFile(midi_filepath)
+    # The first track only holds tempo and other meta events, so without any
+    # other tracks there are no note velocities to merge
+    if len(midi_tracks) < 2:
+        return hole_data
 
-    tick_notes_velocities = {}
+    first_music_px = int(roll_data["FIRST_HOLE"].removesuffix("px"))
 
     total_note_tracks = 2
     if roll_type == "65-note":
         total_note_tracks = 1
 
-    for note_track in midi.tracks[1 : 1 + total_note_tracks]:
-        current_tick = 0
-        for event in note_track:
-            current_tick += event.time
-            if event.type == "note_on":
-                # XXX Not sure why some note events have velocity=1, but this
-                # works with the in-app expression code
-                if event.velocity > 1:
-                    if current_tick in tick_notes_velocities:
-                        tick_notes_velocities[current_tick][event.note] = event.velocity
-                    else:
-                        tick_notes_velocities[current_tick] = {
-                            event.note: event.velocity
-                        }
-
-    for i, hole in enumerate(hole_data):
-        hole_tick = int(hole["ORIGIN_ROW"]) - first_music_px
-        hole_midi = int(hole["MIDI_KEY"])
+    # Index the velocities by (tick, note) so that each hole can be matched to
+    # its note event with a single lookup
+    note_velocities = {
+        (tick, note): velocity
+        for note_track in midi_tracks[1 : 1 + total_note_tracks]
+        for tick, note, velocity in iter_note_on_events(note_track)
+        # XXX Not sure why some note events have velocity=1, but this
+        # works with the in-app expression code
+        if velocity > 1
+    }
 
-        if (
-            hole_tick in tick_notes_velocities
-            and hole_midi in tick_notes_velocities[hole_tick]
-        ):
-            hole_data[i]["VELOCITY"] = tick_notes_velocities[hole_tick][hole_midi]
+    for hole in hole_data:
+        velocity = note_velocities.get((hole["y"] - first_music_px, hole["m"]))
+        if velocity is not None:
+            hole["v"] = velocity
 
     return hole_data
 
 
 def get_hole_report_data(druid, analysis_source_dir):
     """Extracts hole parsing data for the roll specified by DRUID from the roll
-    image parsing output in the associated .txt analysis output file."""
+    image parsing output in the associated .txt analysis output file. The keys
+    of each hole entry are abbreviated so that the hole data uses less space
+    when stored in a JSON file for use with the Pianolatron app."""
 
     txt_filepath = Path(f"{analysis_source_dir}/{druid}.txt")
 
@@ -330,117 +686,147 @@ def get_hole_report_data(druid, analysis_source_dir):
         )
         return roll_data, hole_data
 
-    roll_keys = [
-        "AVG_HOLE_WIDTH",
-        "FIRST_HOLE",
-        "IMAGE_WIDTH",
-        "IMAGE_LENGTH",
-        # "TRACKER_HOLES",
-        # "ROLL_WIDTH",
-        # "HARD_MARGIN_BASS",
-        # "HARD_MARGIN_TREBLE",
-        # "HOLE_SEPARATION",
-        # "HOLE_OFFSET",
-    ]
-
-    hole_keys = [
-        "NOTE_ATTACK",
-        "WIDTH_COL",
-        "ORIGIN_COL",
-        "ORIGIN_ROW",
-        "OFF_TIME",
-        "MIDI_KEY",
-        # "TRACKER_HOLE",
-    ]
-
     dropped_holes = 0
 
-    with txt_filepath.open("r") as _fh:
-        while (line := _fh.readline()) and line != "@@BEGIN: HOLES\n":
-            if match := re.match(r"^@([^@\s]+):\s+(.*)", line):
-                key, value = match.groups()
-                if key in roll_keys:
-                    roll_data[key] = value.replace("px", "").strip()
-
-        # Out-of-spec holes are marked as "BAD" in a special section of the
-        # @ATON .txt hole data file following the NOTES section, but are still
-        # interpreted as note holes (and possibly as control holes ?) when
-        # generating the MIDI file for the roll. So it seems best to include
-        # their data in the output JSON file so that they'll be highlighted
-        # properly in the player.
-        # The .txt hole data file also can contain a TEARS section that follows
-        # the BADHOLES section, so we need to check for the start of the TEARS
-        # section and stop parsing there, to handle the case that a .txt file
-        # has a TEARS section after the NOTES section but no BADHOLES section.
-
-        in_badholes = False
-
-        while (
-            (line := _fh.readline())
-            and line != "@@END: BADHOLES\n"
-            and line != "@@BEGIN: TEARS\n"
-        ):
-            if line == "@@BEGIN: BADHOLES\n":
-                in_badholes = True
-
-            if line == "@@BEGIN: HOLE\n":
-                hole = {}
-            if in_badholes:
-                hole["CATEGORY"] = "bad"
-            if match := re.match(r"^@([^@\s]+):\s+(.*)", line):
-                key, value = match.groups()
-                if key in hole_keys:
-                    hole[key] = int(value.removesuffix("px"))
-            if line == "@@END: HOLE\n":
-                if "NOTE_ATTACK" in hole:
-                    assert "OFF_TIME" in hole
-                    assert hole["NOTE_ATTACK"] == hole["ORIGIN_ROW"]
-                    del hole["NOTE_ATTACK"]
-                    if hole["ORIGIN_ROW"] >= hole["OFF_TIME"]:
-                        # logging.info(f"WARNING: invalid note duration: {hole}")
-                        dropped_holes += 1
-                    else:
-                        hole_data.append(hole)
-                else:
-                    assert "OFF_TIME" not in hole
+    # Out-of-spec holes are marked as "BAD" in a special section of the
+    # @ATON .txt hole data file following the NOTES section, but are still
+    # interpreted as note holes (and possibly as control holes ?) when
+    # generating the MIDI file for the roll. So it seems best to include
+    # their data in the output JSON file so that they'll be highlighted
+    # properly in the player.
+    # The .txt hole data file also can contain a TEARS section that follows
+    # the BADHOLES section, so we need to check for the start of the TEARS
+    # section and stop parsing there, to handle the case that a .txt file
+    # has a TEARS section after the NOTES section but no BADHOLES section.
+
+    in_badholes = False
+    hole = {}
+
+    # The analysis output is plain ASCII, so it is read and scanned as bytes
+    # in one go, with the keys kept as bytes; only the header keys and values
+    # that are kept are decoded. Lines that aren't section delimiters or
+    # wanted keys are skipped over by the regex itself.
+    tokens = ATON_TOKEN.finditer(txt_filepath.read_bytes())
+
+    # The header ends where the HOLES section begins; the same token iterator
+    # then carries on through the holes
+    for match in tokens:
+        delimiter, section, key, value = match.groups()
+        if delimiter == b"BEGIN" and section == b"HOLES":
+            break
+        if key in ROLL_KEYS:
+            roll_data[key.decode()] = value.replace(b"px", b"").strip().decode()
+
+    for match in tokens:
+        delimiter, section, key, value = match.groups()
+
+        if delimiter is None:
+            if key in HOLE_KEYS:
+                hole[key] = int(value.removesuffix(b"px"))
+
+        elif section == b"HOLE":
+            if delimiter == b"BEGIN":
+                hole.clear()
+            elif b"NOTE_ATTACK" in hole:
+                assert b"OFF_TIME" in hole
+                assert hole[b"NOTE_ATTACK"] == hole[b"ORIGIN_ROW"]
+                if hole[b"ORIGIN_ROW"] >= hole[b"OFF_TIME"]:
+                    # logging.info(f"WARNING: invalid note duration: {hole}")
                     dropped_holes += 1
+                else:
+                    new_hole = {
+                        "x": hole[b"ORIGIN_COL"],
+                        "y": hole[b"ORIGIN_ROW"],
+                        "w": hole[b"WIDTH_COL"],
+                        "h": hole[b"OFF_TIME"] - hole[b"ORIGIN_ROW"],
+                        "m": hole[b"MIDI_KEY"],
+                        # "t": hole[b"TRACKER_HOLE"],
+                    }
+                    if in_badholes:
+                        new_hole["c"] = "bad"
+                    hole_data.append(new_hole)
+            else:
+                assert b"OFF_TIME" not in hole
+                dropped_holes += 1
+
+        elif section == b"TEARS" or (delimiter == b"END" and section == b"BADHOLES"):
+            break
+
+        elif section == b"BADHOLES":
+            in_badholes = True
 
     # logging.info(f"Dropped Holes: {dropped_holes}")
     return roll_data, hole_data
 
 
-def remap_hole_data(hole_data):
-    """Abbreviates the keys in the supplied hole_data structure so that it uses
-    less space when stored in a JSON file for use with the Pianolatron app."""
+def get_cached_hole_report_data(druid, analysis_source_dir):
+    """Returns the hole data for the roll specified by DRUID, as extracted by
+    get_hole_report_data(), reusing the data cached by an earlier run if the
+    roll's .txt analysis output file hasn't changed since then."""
 
-    new_hole_data = []
+    txt_filepath = Path(f"{analysis_source_dir}/{druid}.txt")
+    if not txt_filepath.exists():
+        return get_hole_report_data(druid, analysis_source_dir)
+
+    txt_stat = txt_filepath.stat()
+    cache_key = (
+        HOLE_CACHE_VERSION,
+        str(txt_filepath.resolve()),
+        txt_stat.st_mtime_ns,
+        txt_stat.st_size,
+    )
 
-    for hole in hole_data:
-        new_hole = {
-            "x": hole["ORIGIN_COL"],
-            "y": hole["ORIGIN_ROW"],
-            "w": hole["WIDTH_COL"],
-            "h": hole["OFF_TIME"] - hole["ORIGIN_ROW"],
-            "m": hole["MIDI_KEY"],
-            # "t": hole["TRACKER_HOLE"],
-        }
-        if "VELOCITY" in hole:
-            new_hole["v"] = hole["VELOCITY"]
-        if "CATEGORY" in hole:
-            new_hole["c"] = hole["CATEGORY"]
+    cache_filepath = Path(f"{HOLE_CACHE_DIR}/{druid}.pickle")
+    # The cache is only an optimization, so a cache file that can't be read is
+    # ignored (and replaced below) rather than failing the roll and the run
+    if cache_filepath.exists():
+        try:
+            with open(cache_filepath, "rb") as _fh:
+                cached_key, roll_data, hole_data = pickle.load(_fh)
+        except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+            logging.info(f"Ignoring unreadable cached hole data for {druid}")
+        else:
+            if cached_key == cache_key:
+                return roll_data, hole_data
 
-        new_hole_data.append(new_hole)
+    roll_data, hole_data = get_hole_report_data(druid, analysis_source_dir)
 
-    return new_hole_data
+    # As with the JSON output, the cache file is replaced in one step so that
+    # an interrupted run can't leave a truncated file behind
+    cache_filepath.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_filepath.with_suffix(".pickle.tmp")
+    temp_path.write_bytes(
+        pickle.dumps((cache_key, roll_data, hole_data), pickle.HIGHEST_PROTOCOL)
+    )
+    os.replace(temp_path, cache_filepath)
+
+    return roll_data, hole_data
 
 
 def write_json(druid, metadata):
-    """Outputs the JSON data file for the roll specified by DRUID."""
+    """Outputs the JSON data file for the roll specified by DRUID. The data is
+    written to a temporary file that then replaces any existing output, so the
+    app never sees a partially written file."""
 
     output_path = Path(f"output/json/{druid}.json")
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    with output_path.open("w") as _fh:
-        json.dump(metadata, _fh)
+    temp_path = output_path.with_suffix(".json.tmp")
+    temp_path.write_bytes(orjson.dumps(metadata))
+    os.replace(temp_path, output_path)
+
+
+def link_or_copy(source_path, target_path):
+    """Places the file at source_path at target_path as a hard link, which
+    avoids reading and writing the file's contents, or as a copy if the two
+    locations are on different filesystems. Any existing file at target_path
+    is removed first, so that a link is never written through to the source.
+    """
+
+    target_path.unlink(missing_ok=True)
+    try:
+        os.link(source_path, target_path)
+    except OSError:
+        copyfile(source_path, target_path)
 
 
 def get_druids_from_csv_file(druids_fp):
@@ -450,12 +836,13 @@ def get_druids_from_csv_file(druids_fp):
     if not Path(druids_fp).exists():
         logging.error(f"Unable to find DRUIDs file {druids_fp}")
         return []
-    druids_list = []
     with open(druids_fp, "r", newline="") as druid_csv:
-        druid_reader = DictReader(druid_csv)
-        for row in druid_reader:
-            druids_list.append(row["Druid"])
-    return druids_list
+        druid_reader = reader(druid_csv)
+        header = next(druid_reader, None)
+        if header is None:
+            return []
+        druid_column = header.index("Druid")
+        return [row[druid_column] for row in druid_reader if row]
 
 
 def get_druids_from_txt_file(druids_fp):
@@ -465,61 +852,55 @@ def get_druids_from_txt_file(druids_fp):
     if not Path(druids_fp).exists():
         logging.error(f"Unable to find DRUIDs file {druids_fp}")
         return []
-    druids_list = []
     with open(druids_fp, "r") as druid_txt:
-        for line in druid_txt:
-            druids_list.append(line.strip())
-    return druids_list
+        return [druid for line in druid_txt if (druid := line.strip())]
 
 
-def get_druids_from_csv_files():
-    """Runs get_druids_from_csv_file() on all of the CSV files in the druids/
-    input folder."""
+def get_druids_from_druids_folder():
+    """Runs get_druids_from_csv_file() on all of the CSV files and then
+    get_druids_from_txt_file() on all of the text files in the druids/ input
+    folder."""
 
+    druid_files = list(Path("input/druids/").iterdir())
     druids_list = []
-    for druid_file in Path("input/druids/").glob("*.csv"):
-        druids_list.extend(get_druids_from_csv_file(druid_file))
+    for druid_file in druid_files:
+        if druid_file.suffix == ".csv":
+            druids_list.extend(get_druids_from_csv_file(druid_file))
+    for druid_file in druid_files:
+        if druid_file.suffix == ".txt":
+            druids_list.extend(get_druids_from_txt_file(druid_file))
     return druids_list
 
 
-def get_druids_from_txt_files():
-    """Runs get_druids_from_txt_file() on all of the text files in the druids/
-    input folder."""
+def check_midi_profile(druid, roll_data, roll_type, hole_data):
+    """Logs how well the hole data for the roll specified by DRUID fits the
+    expected profile for its roll type. Rolls are processed in parallel, so
+    each message names the roll."""
 
-    druids_list = []
-    for druid_file in Path("input/druids/").glob("*.txt"):
-        druids_list.extend(get_druids_from_txt_file(druid_file))
-    return druids_list
-
-
-def check_midi_profile(roll_data, roll_type, hole_data):
-    column_hole_counts = {}
-    # All currently supported roll types only use MIDI values between
-    # 14 and 114.
-    for i in range(10, 119):
-        column_hole_counts[i] = 0
+    column_hole_counts = Counter(map(itemgetter("m"), hole_data))
 
     last_hole_midi = 0
-    last_hole_tick = 0
     last_hole_duration = 0
 
     first_music_px = int(roll_data["FIRST_HOLE"].removesuffix("px"))
 
-    for hole in hole_data:
-        hole_midi = int(hole["MIDI_KEY"])
-        hole_tick = int(hole["ORIGIN_ROW"]) - first_music_px
-        # Just skip these for now; they should only happen in weird cases like with 65-note rolls
-        if hole_midi == -1:
-            continue
-        column_hole_counts[hole_midi] += 1
-        if hole_tick > last_hole_tick:
-            last_hole_midi = hole_midi
-            last_hole_tick = hole_tick
-            last_hole_duration = hole["OFF_TIME"] - hole["ORIGIN_ROW"]
+    # Holes without a MIDI number are just skipped for now; they should only
+    # happen in weird cases like with 65-note rolls
+    last_hole = max(
+        (hole for hole in hole_data if hole["m"] != -1),
+        key=itemgetter("y"),
+        default=None,
+    )
+    if last_hole is not None and last_hole["y"] > first_music_px:
+        last_hole_midi = last_hole["m"]
+        last_hole_duration = last_hole["h"]
 
     total_holes = len(hole_data)
 
-    sus_midi = []
+    # 65-note not worth checking, ampico not supported yet
+    if roll_type not in SUSPICIOUS_MIDI:
+        return
+
     sus_suffix = ""
     rewind_found = False
 
@@ -527,146 +908,19 @@ def check_midi_profile(roll_data, roll_type, hole_data):
     # by subtracting the NOTE_ATTACK (identical to ORIGIN_ROW) from the OFF_TIME
     # Minimum Red Welte rewind hole duration can be as low as 390 (px)
 
-    if roll_type == "welte-red":
-        # Left control: 14-23 (22 and 23 are questionable because many rolls do use the motor (fan) on/off switch)
-        # C1: 24, C#1: 25, G7: 103
-        # 104: rewind, 106: electric cutoff (rarely used). Right control ends at 113
-        sus_midi = [10, 11, 12, 13, 24, 25, 103, 104, 105, 106, 114, 115, 116, 117, 118]
-        if not (
-            last_hole_midi == 104 or last_hole_midi == 14
-        ):  # 113 is also pretty common
-            logging.info(
-                f"Roll type is Red Welte, but last hole MIDI is not the expected rewind hole: {last_hole_midi}",
-            )
-            sus_suffix += "!"
-        else:
-            rewind_found = True
-
-    elif roll_type == "welte-green":
-        # Left control: 16-20, A0: 21, A#0: 22, A#7: 106, B7: 107, C8: 108, Right control: 109-113
-        # Green Welte rewind (16, shared with sfzp) holes tend to be longer.
-        # Also sometimes there's a long C8 (108) after the rewind...
-        sus_midi = [
-            10,
-            11,
-            12,
-            13,
-            14,
-            15,
-            21,
-            22,
-            23,
-            106,
-            107,
-            108,
-            114,
-            115,
-            116,
-            117,
-            118,
-        ]
-        if last_hole_midi != 16:
-            logging.info(
-                f"Roll type is Green Welte, but last hole MIDI is not the expected rewind hole: {last_hole_midi}",
-            )
-            sus_suffix += "!"
-        else:
+    if roll_type in REWIND_HOLES:
+        roll_type_name, rewind_midi = REWIND_HOLES[roll_type]
+        if last_hole_midi in rewind_midi:
             rewind_found = True
-
-    elif roll_type == "welte-licensee":
-        # Left control: 16-23, C1: 24, C#1: 25, F#7: 102, G7: 103, Rewind: 104, Blank: 105, Right control: 106-113
-        sus_midi = [
-            10,
-            11,
-            12,
-            13,
-            14,
-            15,
-            24,
-            25,
-            102,
-            103,
-            104,
-            105,
-            114,
-            115,
-            116,
-            117,
-            118,
-        ]
-        if last_hole_midi != 104:
-            logging.info(
-                f"Roll type is Licensee, but last hole MIDI is not the expected rewind hole: {last_hole_midi}",
-            )
-            sus_suffix += "!"
         else:
-            rewind_found = True
-
-    elif roll_type == "88-note":
-        # Unused controls: 15-17, except 16 is sometimes the rewind hole
-        # A0: 21, A#0: 22, B6: 107, C7: 108
-        # Unused controls: 111-114
-        sus_midi = [
-            10,
-            11,
-            12,
-            13,
-            14,
-            15,
-            16,
-            17,
-            21,
-            22,
-            107,
-            108,
-            111,
-            112,
-            113,
-            114,
-            115,
-            116,
-            117,
-            118,
-        ]
-
-    elif roll_type == "duo-art":
-        # Rewind (wide hole): 16, Empty (overlaps with rewind): 17, Left controls: 18-24
-        # C#1: 25, D1: 26, G7: 103, G#7: 104
-        # Right control: 105-110, 111-112 blank, 113 is sustain pedal
-        sus_midi = [
-            10,
-            11,
-            12,
-            13,
-            14,
-            15,
-            25,
-            26,
-            103,
-            104,
-            111,
-            112,
-            114,
-            115,
-            116,
-            117,
-            118,
-        ]
-        if last_hole_midi != 16:
             logging.info(
-                f"Roll type is Duo-Art, but last hole MIDI is not the expected rewind hole: {last_hole_midi}",
+                f"Roll type of {druid} is {roll_type_name}, but last hole MIDI is not the expected rewind hole: {last_hole_midi}",
             )
             sus_suffix += "!"
-        else:
-            rewind_found = True
 
-    else:
-        # 65-note not worth checking, ampico not supported yet
-        return
-
-    total_sus_holes = 0
-    for midi in sus_midi:
-        total_sus_holes += column_hole_counts[midi]
+    total_sus_holes = sum(
+        column_hole_counts[midi] for midi in SUSPICIOUS_MIDI[roll_type]
+    )
 
     sus_ratio = total_sus_holes / total_holes
 
@@ -679,13 +933,22 @@ def check_midi_profile(roll_data, roll_type, hole_data):
     if rewind_found:
         rewind_message = "(at rewind hole location)"
 
-    logging.info(f"Final hole duration: {last_hole_duration} {rewind_message}")
+    logging.info(
+        f"Final hole duration for {druid}: {last_hole_duration} {rewind_message}"
+    )
 
     logging.info(
-        f"Total holes: {total_holes}, total sus holes: {total_sus_holes}, ratio: {sus_ratio:.3f} {sus_suffix}"
+        f"Total holes for {druid}: {total_holes}, total sus holes: {total_sus_holes}, ratio: {sus_ratio:.3f} {sus_suffix}"
     )
 
 
+def get_short_name(name):
+    """Returns the short form of a person's name (e.g., the surname from
+    "Surname, First names, dates") for use in the search title."""
+
+    return name.split(",", 1)[0].strip()
+
+
 def refine_metadata(metadata):
     """Applies various rules to massage the roll metadata extracted from its
     MODS file in get_metadata_for_druid() into formats that can be included
@@ -711,17 +974,16 @@ def refine_metadata(metadata):
         metadata["number"] = "----"
 
     # Construct a more user-friendly title from the contents of <titleInfo>
-    fulltitle = metadata["title"].capitalize()
+    title_parts = [metadata["title"].capitalize()]
     if metadata["title_prefix"] is not None:
-        fulltitle = f"{metadata['title_prefix']} {fulltitle}"
-    if metadata["subtitle"] is not None:
-        fulltitle = f"{fulltitle}: {metadata['subtitle']}"
-    if metadata["title_part_number"] is not None:
-        fulltitle = f"{fulltitle}: {metadata['title_part_number']}"
-    if metadata["title_part_name"] is not None:
-        fulltitle = f"{fulltitle}: {metadata['title_part_name']}"
+        title_parts[0] = f"{metadata['title_prefix']} {title_parts[0]}"
+    for field in ["subtitle", "title_part_number", "title_part_name"]:
+        if metadata[field] is not None:
+            title_parts.append(metadata[field])
+    fulltitle = ": ".join(title_parts)
 
-    metadata["title"] = fulltitle.replace(" : ", ": ").replace(" ; ", "; ")
+    title = fulltitle.replace(" : ", ": ").replace(" ; ", "; ")
+    metadata["title"] = title
 
     # Construct a summary of the roll's music to use in the searchbar
     searchtitle = None
@@ -731,11 +993,11 @@ def refine_metadata(metadata):
     arranger = ""
     performer = ""
     if metadata["composer"] is not None:
-        composer_short = metadata["composer"].split(",")[0].strip()
+        composer_short = get_short_name(metadata["composer"])
         composer = metadata["composer"]
 
     if metadata["original_composer"] is not None:
-        original_composer_short = metadata["original_composer"].split(",")[0].strip()
+        original_composer_short = get_short_name(metadata["original_composer"])
         if (
             metadata["composer"] is not None
             and original_composer_short != composer_short
@@ -748,7 +1010,7 @@ def refine_metadata(metadata):
         searchtitle = composer_short
 
     if metadata["arranger"] is not None:
-        arranger_short = metadata["arranger"].split(",")[0].strip()
+        arranger_short = get_short_name(metadata["arranger"])
         if searchtitle is not None and arranger_short != composer_short:
             searchtitle += f"-{arranger_short}"
         else:
@@ -756,7 +1018,7 @@ def refine_metadata(metadata):
         arranger = metadata["arranger"]
 
     if metadata["performer"] is not None:
-        performer_short = metadata["performer"].split(",")[0].strip()
+        performer_short = get_short_name(metadata["performer"])
         if searchtitle is not None:
             searchtitle += "/" + performer_short
         else:
@@ -764,11 +1026,11 @@ def refine_metadata(metadata):
         performer = metadata["performer"]
 
     if searchtitle is not None:
-        searchtitle += " - " + fulltitle
+        searchtitle += " - " + title
     else:
-        searchtitle = fulltitle
+        searchtitle = title
 
-    metadata["searchtitle"] = searchtitle.replace(" : ", ": ").replace(" ; ", "; ")
+    metadata["searchtitle"] = searchtitle
 
     metadata["for_catalog"] = {
         "composer": composer,
@@ -780,10 +1042,103 @@ def refine_metadata(metadata):
     return metadata
 
 
+def process_druid(druid, args):
+    """Builds the JSON file for the roll specified by DRUID and copies its MIDI
+    files to the output/midi/ folders, returning the roll's entry for the
+    catalog.json file (or None if its metadata couldn't be obtained)."""
+
+    metadata = get_metadata_for_druid(druid)
+    if metadata is None:
+        logging.info(f"Unable to get metadata for DRUID {druid}, skipping")
+        return None
+
+    metadata = refine_metadata(metadata)
+
+    logging.info(f"Processing {druid}, roll type is {metadata['type']}...")
+
+    note_midi_filepath = Path(f"output/midi/note/{druid}.mid")
+    link_or_copy(
+        Path(f"{args.midi_source_dir}/note/{druid}_note.mid"), note_midi_filepath
+    )
+    metadata["NOTE_MIDI_TPQ"] = get_midi_ticks_per_beat(note_midi_filepath)
+
+    # For 65-note rolls, the _note.mid file in the exp/ source folder is used
+    exp_midi_suffix = "note" if metadata["type"] == "65-note" else "exp"
+    exp_midi_filepath = Path(f"output/midi/exp/{druid}.mid")
+    link_or_copy(
+        Path(f"{args.midi_source_dir}/exp/{druid}_{exp_midi_suffix}.mid"),
+        exp_midi_filepath,
+    )
+
+    # The expression MIDI file is read once, for both the tempo map and the
+    # hole velocities
+    exp_midi_tracks = None
+    if exp_midi_filepath.exists():
+        exp_midi_tracks = read_midi_tracks(exp_midi_filepath)
+
+    if WRITE_TEMPO_MAPS and exp_midi_tracks is not None:
+        metadata["tempoMap"] = build_tempo_map_from_midi(exp_midi_tracks)
+
+    roll_data, hole_data = get_cached_hole_report_data(druid, args.analysis_source_dir)
+
+    # Add roll-level hole report info to the metadata
+    for key in roll_data:
+        metadata[key] = roll_data[key]
+
+    if hole_data:
+        hole_data = merge_midi_velocities(
+            roll_data, hole_data, druid, exp_midi_tracks, metadata["type"]
+        )
+
+        # Check to see whether the parser output has a lot of holes in
+        # columns where there shouldn't be holes; raise a warning if so
+        check_midi_profile(druid, roll_data, metadata["type"], hole_data)
+
+        metadata["holeData"] = hole_data
+    else:
+        metadata["holeData"] = None
+
+    write_json(druid, metadata)
+
+    for_catalog = metadata["for_catalog"]
+    return {
+        "druid": druid,
+        "title": metadata["searchtitle"],
+        "composer": for_catalog["composer"],
+        "performer": for_catalog["performer"],
+        "arranger": for_catalog["arranger"],
+        "work": for_catalog["work"],
+        "image_url": metadata["image_url"],
+        "type": metadata["type"],
+        "number": metadata["number"],
+        "publisher": metadata["publisher"],
+    }
+
+
+def positive_int(value):
+    """Converts a command-line argument to an integer, rejecting anything that
+    isn't a positive whole number."""
+
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value!r}")
+    return number
+
+
+def configure_logging():
+    """Sets up logging of progress messages, in the main process as well as
+    in the worker processes that process the rolls."""
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+
 def main():
     """Command-line entry-point."""
 
-    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    configure_logging()
 
     argparser = argparse.ArgumentParser(
         description="""Generate per-roll DRUID.json files as well as a
@@ -824,7 +1179,7 @@ def main():
     argparser.add_argument(
         "--redownload-xml",
         action="store_true",
-        help="Always download XML files, overwriting files in input/xml/",
+        help="Always request XML files, overwriting files in input/xml/ that have changed",
     )
     argparser.add_argument(
         "--midi-source-dir",
@@ -836,6 +1191,12 @@ def main():
         default=TXT_DIR,
         help="Folder containg hole analysis output files (DRUID.txt)",
     )
+    argparser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        help="Number of worker processes to process rolls with (default: one per CPU)",
+    )
 
     args = argparser.parse_args()
 
@@ -851,97 +1212,60 @@ def main():
     # If no DRDUIDS or .txt or .csv files containing DRUIDs are provided on the
     # command line, look for files listing DRUIDS in the local druids/ folder.
     if len(druids) == 0:
-        druids.extend(get_druids_from_csv_files())
-        druids.extend(get_druids_from_txt_files())
+        druids.extend(get_druids_from_druids_folder())
 
     # Override cmd line or CSV (or TXT) DRUIDs lists
     # druids = ["hb523vs3190"]
 
-    catalog_entries = []
+    # The same roll can be listed more than once, e.g., in several of the
+    # files in the druids/ folder, but it only needs to be processed once
+    druids = list(dict.fromkeys(druids))
 
     for druid in druids:
         if druid in ROLLS_TO_SKIP:
             logging.info(f"Skipping DRUID {druid}")
-            continue
-
-        metadata = get_metadata_for_druid(druid, args.redownload_xml)
-        if metadata is None:
-            logging.info(f"Unable to get metadata for DRUID {druid}, skipping")
-            continue
-
-        metadata = refine_metadata(metadata)
-
-        logging.info(f"Processing {druid}, roll type is {metadata['type']}...")
-
-        copy(
-            Path(f"{args.midi_source_dir}/note/{druid}_note.mid"),
-            Path(f"output/midi/note/{druid}.mid"),
-        )
-        note_midi = MidiFile(Path(f"output/midi/note/{druid}.mid"))
-        metadata["NOTE_MIDI_TPQ"] = note_midi.ticks_per_beat
-
-        if metadata["type"] == "65-note":
-            copy(
-                Path(f"{args.midi_source_dir}/exp/{druid}_note.mid"),
-                Path(f"output/midi/exp/{druid}.mid"),
-            )
-        else:
-            copy(
-                Path(f"{args.midi_source_dir}/exp/{druid}_exp.mid"),
-                Path(f"output/midi/exp/{druid}.mid"),
-            )
-
-        if WRITE_TEMPO_MAPS:
-            metadata["tempoMap"] = build_tempo_map_from_midi(druid)
-
-        roll_data, hole_data = get_hole_report_data(druid, args.analysis_source_dir)
-
-        # Add roll-level hole report info to the metadata
-        for key in roll_data:
-            metadata[key] = roll_data[key]
-
-        if hole_data:
-            hole_data = merge_midi_velocities(
-                roll_data, hole_data, druid, metadata["type"]
-            )
-
-            # Check to see whether the parser output has a lot of holes in
-            # columns where there shouldn't be holes; raise a warning if so
-            check_midi_profile(roll_data, metadata["type"], hole_data)
-
-            metadata["holeData"] = remap_hole_data(hole_data)
-        else:
-            metadata["holeData"] = None
-
-        write_json(druid, metadata)
-
-        if not args.no_catalog:
-            catalog_entries.append(
-                {
-                    "druid": druid,
-                    "title": metadata["searchtitle"],
-                    "composer": metadata["for_catalog"]["composer"],
-                    "performer": metadata["for_catalog"]["performer"],
-                    "arranger": metadata["for_catalog"]["arranger"],
-                    "work": metadata["for_catalog"]["work"],
-                    "image_url": metadata["image_url"],
-                    "type": metadata["type"],
-                    "number": metadata["number"],
-                    "publisher": metadata["publisher"],
-                }
+    druids = [druid for druid in druids if druid not in ROLLS_TO_SKIP]
+
+    # Fetch the XML files that aren't available locally (or all of them, if
+    # requested) before processing any rolls, so that the downloads all
+    # overlap with each other instead of being spread across the processing.
+    xml_druids = [
+        druid
+        for druid in druids
+        if args.redownload_xml or not Path(f"input/xml/{druid}.xml").exists()
+    ]
+    if xml_druids:
+        logging.info(f"Downloading {len(xml_druids)} XML files")
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+            list(executor.map(download_xml, xml_druids))
+
+    # Rolls are independent of each other, and most of the work for each roll
+    # (parsing its XML and hole data) is CPU-bound Python code that holds the
+    # GIL, so process them in parallel in one worker process per CPU. They are
+    # handed out in small batches to cut down on inter-process messaging.
+    with ProcessPoolExecutor(
+        max_workers=args.jobs, initializer=configure_logging
+    ) as executor:
+        catalog_entries = [
+            catalog_entry
+            for catalog_entry in executor.map(
+                partial(process_druid, args=args), druids, chunksize=DRUIDS_PER_TASK
             )
+            if catalog_entry is not None
+        ]
 
     if not args.no_catalog:
-        sorted_catalog = sorted(catalog_entries, key=lambda i: i["title"])
-        with open("output/catalog.json", "w", encoding="utf8") as catalog_file:
-            json.dump(
-                sorted_catalog,
-                catalog_file,
-                ensure_ascii=False,
-                indent=2,
-                sort_keys=True,
+        catalog_entries.sort(key=itemgetter("title"))
+        # orjson always writes UTF-8, and with these options its output is
+        # laid out the same as json.dump(..., indent=2, sort_keys=True)
+        Path("output/catalog.json").write_bytes(
+            orjson.dumps(
+                catalog_entries,
+                option=orjson.OPT_INDENT_2
+                | orjson.OPT_SORT_KEYS
+                | orjson.OPT_APPEND_NEWLINE,
             )
-            catalog_file.write("\n")
+        )
 
 
 if __name__ == "__main__":